@@ -10,7 +10,7 @@ from .shims import MXNetShim, maybe_handshake_model
 from .optimizers import Adam, RAdam, SGD, Optimizer
 from .schedules import cyclic_triangular, warmup_linear, constant, constant_then
 from .schedules import decaying, slanted_triangular, compounding
-from .types import Ragged, Padded, ArgsKwargs, Unserializable
+from .types import Ragged, RaggedTuple, Padded, ArgsKwargs, Unserializable
 from .util import fix_random_seed, is_cupy_array, set_active_gpu
 from .util import prefer_gpu, require_gpu, require_cpu
 from .util import DataValidationError, data_validation
@@ -9,7 +9,7 @@ from .. import registry
 from ..types import Xp, Shape, DTypes, DTypesInt, DTypesFloat, List2d, ArrayXd
 from ..types import Array3d, Floats1d, Floats2d, Floats3d, Floats4d
 from ..types import FloatsXd, Ints1d, Ints2d, Ints3d, Ints4d, IntsXd, _Floats
-from ..types import DeviceTypes, Generator, Padded, Batchable, SizedGenerator
+from ..types import DeviceTypes, Generator, Padded, Ragged, Batchable, SizedGenerator
 from ..util import get_array_module, is_xp_array, to_numpy
 
 
@@ -369,6 +369,52 @@ class Ops:
             unpadded[indices[i]] = data[i, : int(lengths[i])]
         return cast(List2d, unpadded)
 
+    def padded2ragged(self, padded: Padded) -> Ragged:
+        """Unpack a Padded datatype to a Ragged, with the sequences in their
+        original order. The data is copied once, rather than round-tripping
+        through a list of arrays.
+        """
+        # Transpose from (length, batch, data) to (batch, length, data), and
+        # restore the original ordering.
+        data = self.as_contig(padded.data.transpose((1, 0, 2)))
+        order = self.xp.argsort(padded.indices)
+        data = data[order]
+        lengths = self.asarray1i(padded.lengths[order])
+        mask = self.xp.arange(data.shape[1])[None, :] < lengths[:, None]
+        return Ragged(data[mask], lengths)
+
+    def ragged2padded(self, ragged: Ragged) -> Padded:
+        """Pack a Ragged datatype into a Padded, sorted by decreasing length.
+        The data is copied once, rather than round-tripping through a list
+        of arrays.
+        """
+        xp = self.xp
+        lengths = ragged.lengths
+        nB = lengths.shape[0]
+        if nB == 0:
+            return Padded(
+                self.alloc3f(0, 0, 0), self.alloc1i(0), self.alloc1i(0), self.alloc1i(0)
+            )
+        indices = xp.argsort(-lengths)
+        sorted_lengths = lengths[indices]
+        nS = int(sorted_lengths[0])
+        data = cast(Floats2d, ragged.data)
+        starts = xp.concatenate((xp.zeros((1,), dtype="i"), xp.cumsum(lengths)))
+        mask = xp.arange(nS)[None, :] < sorted_lengths[:, None]
+        # For each valid (row, column) cell, the position of its token on the
+        # concatenated axis.
+        token_idx = (starts[indices][:, None] + xp.arange(nS)[None, :])[mask]
+        arr = self.alloc((nB, nS, data.shape[1]), dtype=data.dtype)
+        arr[mask] = data[token_idx]
+        arr = self.as_contig(arr.transpose((1, 0, 2)))
+        size_at_t = (sorted_lengths[None, :] > xp.arange(nS)[:, None]).sum(axis=1)
+        return Padded(
+            cast(Floats3d, arr),
+            self.asarray1i(size_at_t),
+            self.asarray1i(sorted_lengths),
+            self.asarray1i(indices),
+        )
+
     def get_dropout_mask(self, shape: Shape, drop: Optional[float]) -> FloatsXd:
         """Create a random mask for applying dropout, with a certain percent of
         the mask (defined by `drop`) will contain zeros. The neurons at those
@@ -1,12 +1,15 @@
 from typing import Tuple, Callable, Optional, TypeVar, Union, cast
 
-from ..types import Padded, Ragged, Ints1d, Array2d, List2d
+import numpy
+
+from ..types import Padded, Ragged, RaggedTuple, Ints1d, Array2d, List2d
 from ..model import Model
+from ..backends import NumpyOps
 from ..config import registry
 
 
 RaggedData = Tuple[Array2d, Ints1d]
-SeqT = TypeVar("SeqT", bound=Union[Padded, Ragged, List2d, RaggedData])
+SeqT = TypeVar("SeqT", bound=Union[Padded, Ragged, RaggedTuple, List2d, RaggedData])
 
 
 @registry.layers("with_ragged.v1")
@@ -18,15 +21,22 @@ def forward(
     model: Model[SeqT, SeqT], Xseq: SeqT, is_train: bool
 ) -> Tuple[SeqT, Callable]:
     layer: Model[Ragged, Ragged] = model.layers[0]
-    Y: Union[Padded, Ragged, List2d, RaggedData]
-    if isinstance(Xseq, Ragged):
-        Y, backprop = layer(Xseq, is_train)
-    elif isinstance(Xseq, Padded):
-        Y, backprop = _padded_forward(layer, cast(Padded, Xseq), is_train)
-    elif _is_ragged_data(Xseq):
-        Y, backprop = _tuple_forward(layer, cast(RaggedData, Xseq), is_train)
-    else:
-        Y, backprop = _list_forward(layer, cast(List2d, Xseq), is_train)
+    # Dispatch on the exact type where we can: one dict lookup, rather than
+    # a chain of isinstance checks on every call.
+    handler = _DISPATCH.get(type(Xseq))
+    if handler is None:
+        # Subclasses of the registered types miss the exact-type table.
+        if isinstance(Xseq, Ragged):
+            handler = _ragged_forward
+        elif isinstance(Xseq, Padded):
+            handler = _padded_forward
+        elif isinstance(Xseq, RaggedTuple):
+            handler = _ragged_tuple_forward
+        elif _is_ragged_data(Xseq):
+            handler = _tuple_forward
+        else:
+            handler = _list_forward
+    Y, backprop = handler(layer, Xseq, is_train)
     return cast(Tuple[SeqT, Callable], (Y, backprop))
 
 
@@ -44,18 +54,49 @@ def _is_ragged_data(seq):
     return isinstance(seq, tuple) and len(seq) == 2
 
 
+def _get_lengths(ops, seqs):
+    if isinstance(ops, NumpyOps):
+        # One preallocated C-level pass, rather than building a Python list
+        # of boxed ints and re-iterating it in asarray.
+        return numpy.fromiter((len(x) for x in seqs), dtype="int32", count=len(seqs))
+    else:
+        return ops.asarray1i([len(x) for x in seqs])
+
+
 def _get_ragged(model, seq):
     if isinstance(seq, Ragged):
         return seq
     elif isinstance(seq, Padded):
-        lists = model.ops.padded2list(seq)
-        lengths = model.ops.asarray1i([len(x) for x in lists])
-        return Ragged(model.ops.flatten(lists), lengths)
+        # Padded carries its own length metadata, so there's no need to
+        # materialize a list of arrays just to take len() of each member.
+        return model.ops.padded2ragged(seq)
+    elif isinstance(seq, RaggedTuple):
+        return Ragged(seq.data, seq.lengths)
     elif _is_ragged_data(seq):
         return Ragged(*seq)
     else:
-        lengths = model.ops.asarray1i([len(x) for x in seq])
-        return Ragged(model.ops.flatten(seq), lengths)
+        return Ragged(model.ops.flatten(seq), _get_lengths(model.ops, seq))
+
+
+def _ragged_forward(layer: Model[Ragged, Ragged], Xseq: Ragged, is_train: bool):
+    return layer(Xseq, is_train)
+
+
+def _tuple_or_list_forward(layer: Model[Ragged, Ragged], Xseq, is_train: bool):
+    if _is_ragged_data(Xseq):
+        return _tuple_forward(layer, Xseq, is_train)
+    else:
+        return _list_forward(layer, Xseq, is_train)
+
+
+def _ragged_tuple_forward(layer: Model[Ragged, Ragged], X: RaggedTuple, is_train: bool):
+    Yr, get_dXr = layer(Ragged(X.data, X.lengths), is_train)
+
+    def backprop(dY: RaggedTuple) -> RaggedTuple:
+        dXr = get_dXr(Ragged(dY.data, dY.lengths))
+        return RaggedTuple(dXr.data, dXr.lengths)
+
+    return RaggedTuple(Yr.data, Yr.lengths), backprop
 
 
 def _tuple_forward(layer: Model[Ragged, Ragged], X: RaggedData, is_train: bool):
@@ -70,25 +111,25 @@ def _tuple_forward(layer: Model[Ragged, Ragged], X: RaggedData, is_train: bool):
 
 def _padded_forward(layer, Xp, is_train):
     # Assign these to locals, to keep code a bit shorter.
-    list2padded = layer.ops.list2padded
-    padded2list = layer.ops.padded2list
-    unflatten = layer.ops.unflatten
-    flatten = layer.ops.flatten
+    padded2ragged = layer.ops.padded2ragged
+    ragged2padded = layer.ops.ragged2padded
     # It's worth being a bit careful about memory here, as the activations
-    # are potentially large on GPU. So we make nested function calls instead
-    # of assigning to temporaries where possible, so memory can be reclaimed
-    # sooner.
-    Xs = padded2list(Xp)
-    # Bit annoying here: padded is in a different order, so we need to make new
-    # lengths.
-    lengths = layer.ops.asarray1i([len(x) for x in Xs])
-    Yr, get_dXr = layer(Ragged(flatten(Xs), lengths), is_train)
+    # are potentially large on GPU. The padded2ragged/ragged2padded pair
+    # copies the data once in each direction, rather than round-tripping
+    # through a list of arrays.
+    Yr, get_dXr = layer(padded2ragged(Xp), is_train)
 
-    def backprop(dYp: Padded):
-        flattened = flatten(padded2list(dYp))
-        return list2padded(unflatten(get_dXr(Ragged(flattened, lengths)).data, lengths))
+    # Bind the captured names as default arguments, so the hot backward path
+    # loads them with LOAD_FAST rather than LOAD_DEREF.
+    def backprop(
+        dYp: Padded,
+        padded2ragged=padded2ragged,
+        ragged2padded=ragged2padded,
+        get_dXr=get_dXr,
+    ):
+        return ragged2padded(get_dXr(padded2ragged(dYp)))
 
-    return list2padded(unflatten(Yr.data, Yr.lengths)), backprop
+    return ragged2padded(Yr), backprop
 
 
 def _list_forward(layer, Xs, is_train: bool):
@@ -96,11 +137,29 @@ def _list_forward(layer, Xs, is_train: bool):
     flatten = layer.ops.flatten
     unflatten = layer.ops.unflatten
 
-    lengths = layer.ops.asarray1i([len(x) for x in Xs])
+    lengths = _get_lengths(layer.ops, Xs)
     Yr, get_dXr = layer(Ragged(flatten(Xs), lengths), is_train)
 
-    def backprop(dYs):
-        flattened = flatten(dYs)
-        return unflatten(get_dXr(Ragged(flattened, lengths)).data, lengths)
+    # Bind the captured names as default arguments, so the hot backward path
+    # loads them with LOAD_FAST rather than LOAD_DEREF.
+    def backprop(
+        dYs,
+        flatten=flatten,
+        unflatten=unflatten,
+        lengths=lengths,
+        get_dXr=get_dXr,
+        Ragged=Ragged,
+    ):
+        dXr = get_dXr(Ragged(flatten(dYs), lengths))
+        return unflatten(dXr.data, lengths)
 
     return unflatten(Yr.data, Yr.lengths), backprop
+
+
+_DISPATCH = {
+    Ragged: _ragged_forward,
+    Padded: _padded_forward,
+    RaggedTuple: _ragged_tuple_forward,
+    tuple: _tuple_or_list_forward,
+    list: _list_forward,
+}
@@ -10,7 +10,7 @@ from thinc.api import get_current_ops, use_ops
 from thinc.util import has_torch, torch2xp, xp2torch
 from thinc.api import fix_random_seed
 from thinc.api import LSTM
-from thinc.types import Floats2d
+from thinc.types import Floats2d, Ragged
 import inspect
 
 from .. import strategies
@@ -673,6 +673,33 @@ def test_flatten_unflatten_roundtrip(cpu_ops, X):
     assert_allclose(X, unflat2)
 
 
+@pytest.mark.parametrize("ops", ALL_OPS)
+def test_padded2ragged(ops):
+    lengths = [4, 2, 5, 2]
+    Xs = [
+        ops.alloc2f(length, 3) + float(i) for i, length in enumerate(lengths)
+    ]
+    ragged = ops.padded2ragged(ops.list2padded(Xs))
+    assert ragged.lengths.tolist() == lengths
+    ops.xp.testing.assert_allclose(ragged.data, ops.flatten(Xs))
+
+
+@pytest.mark.parametrize("ops", ALL_OPS)
+def test_ragged2padded_roundtrip(ops):
+    lengths = [4, 2, 5, 2]
+    Xs = [
+        cast(Floats2d, ops.asarray2f(numpy.random.uniform(-1, 1, (length, 3))))
+        for length in lengths
+    ]
+    ragged = Ragged(ops.flatten(Xs), ops.asarray1i(lengths))
+    padded = ops.ragged2padded(ragged)
+    assert padded.lengths.tolist() == sorted(lengths, reverse=True)
+    assert padded.size_at_t.tolist() == [4, 4, 2, 2, 1]
+    unpadded = ops.padded2list(padded)
+    for X, Y in zip(Xs, unpadded):
+        ops.xp.testing.assert_allclose(X, Y)
+
+
 @pytest.mark.parametrize("ops", ALL_OPS)
 def test_reduce_sum(ops):
     m = ops.xp.zeros((19, 5), dtype="f")
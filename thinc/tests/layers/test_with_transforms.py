@@ -4,6 +4,7 @@ import numpy.testing
 from thinc.api import NumpyOps, Model, Linear, noop
 from thinc.api import with_array2d, with_array, with_padded, with_list
 from thinc.api import with_ragged, with_getitem
+from thinc.api import RaggedTuple
 from thinc.types import Padded, Ragged
 
 
@@ -61,6 +62,11 @@ def ragged_data_input(ragged_input):
     return (ragged_input.data, ragged_input.lengths)
 
 
+@pytest.fixture
+def ragged_tuple_input(ragged_input):
+    return RaggedTuple(ragged_input.data, ragged_input.lengths)
+
+
 @pytest.fixture
 def noop_models():
     return [
@@ -206,9 +212,15 @@ def test_with_list_initialize(ragged_input, padded_input, list_input):
 
 
 def test_with_ragged_initialize(
-    ragged_input, padded_input, list_input, ragged_data_input
+    ragged_input, padded_input, list_input, ragged_data_input, ragged_tuple_input
 ):
-    for inputs in (ragged_input, padded_input, list_input, ragged_data_input):
+    for inputs in (
+        ragged_input,
+        padded_input,
+        list_input,
+        ragged_data_input,
+        ragged_tuple_input,
+    ):
         check_initialize(get_ragged_model(), inputs)
 
 
@@ -233,8 +245,16 @@ def test_with_padded_forward(ragged_input, padded_input, list_input, padded_data
         check_transform_produces_correct_output_type_forward(model, inputs, checker)
 
 
-def test_with_ragged_forward(ragged_input, padded_input, list_input, ragged_data_input):
-    for inputs in (ragged_input, padded_input, list_input, ragged_data_input):
+def test_with_ragged_forward(
+    ragged_input, padded_input, list_input, ragged_data_input, ragged_tuple_input
+):
+    for inputs in (
+        ragged_input,
+        padded_input,
+        list_input,
+        ragged_data_input,
+        ragged_tuple_input,
+    ):
         checker = get_data_checker(inputs)
         model = get_ragged_model()
         check_transform_produces_correct_output_type_forward(model, inputs, checker)
@@ -255,9 +275,15 @@ def test_with_list_backward(ragged_input, padded_input, list_input):
 
 
 def test_with_ragged_backward(
-    ragged_input, padded_input, list_input, ragged_data_input
+    ragged_input, padded_input, list_input, ragged_data_input, ragged_tuple_input
 ):
-    for inputs in (ragged_input, padded_input, list_input, ragged_data_input):
+    for inputs in (
+        ragged_input,
+        padded_input,
+        list_input,
+        ragged_data_input,
+        ragged_tuple_input,
+    ):
         checker = get_data_checker(inputs)
         model = get_ragged_model()
         check_transform_produces_correct_output_type_backward(model, inputs, checker)
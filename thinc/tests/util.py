@@ -2,7 +2,7 @@ import contextlib
 from pathlib import Path
 import tempfile
 import shutil
-from thinc.api import Linear, Ragged, Padded, ArgsKwargs
+from thinc.api import Linear, Ragged, RaggedTuple, Padded, ArgsKwargs
 import numpy
 import pytest
 
@@ -32,6 +32,8 @@ def get_shape(W_b_input):
 def get_data_checker(inputs):
     if isinstance(inputs, Ragged):
         return assert_raggeds_match
+    elif isinstance(inputs, RaggedTuple):
+        return assert_ragged_tuples_match
     elif isinstance(inputs, Padded):
         return assert_paddeds_match
     elif isinstance(inputs, list):
@@ -88,6 +90,12 @@ def assert_ragged_data_match(X, Y):
     return assert_raggeds_match(Ragged(*X), Ragged(*Y))
 
 
+def assert_ragged_tuples_match(X, Y):
+    assert isinstance(X, RaggedTuple)
+    assert isinstance(Y, RaggedTuple)
+    return assert_raggeds_match(Ragged(X.data, X.lengths), Ragged(Y.data, Y.lengths))
+
+
 def check_input_converters(Y, backprop, data, n_args, kwargs_keys, type_):
     assert isinstance(Y, ArgsKwargs)
     assert len(Y.args) == n_args
@@ -900,6 +900,18 @@ class Ragged:
         return self._get_starts_ends()[1:]
 
 
+@dataclass(frozen=True)
+class RaggedTuple:
+    """A lightweight, immutable (data, lengths) pair of ragged sequence data.
+    Unlike a plain tuple, it can be recognized with a single isinstance check,
+    so layers that accept several sequence formats don't have to probe the
+    tuple's length to dispatch on it.
+    """
+
+    data: Array2d
+    lengths: Ints1d
+
+
 _P = TypeVar("_P", bound=Sequence)
 
 